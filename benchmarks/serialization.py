@@ -0,0 +1,92 @@
+"""Compare the default and fast json paths for the list endpoints
+
+Run with: poetry run python benchmarks/serialization.py [number of subscriptions]
+"""
+
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from sns_sub_manager.routes.subscribe import get_subscriptions
+from sns_sub_manager.routes.subscribe import sub_router
+from sns_sub_manager.schemas.subscribe import Subscription
+from sns_sub_manager.utils.responses import FastJSONResponse
+
+
+def fake_page(count: int):
+    """What get_topic_subscriptions returns from SNS"""
+    return [
+        {
+            "SubscriptionArn": f"arn:aws:sns:us-east-1:123456789012:test:{i:036d}",
+            "Owner": "123456789012",
+            "Protocol": "https",
+            "Endpoint": f"https://example.com/hooks/{i}",
+            "TopicArn": "arn:aws:sns:us-east-1:123456789012:test",
+        }
+        for i in range(count)
+    ]
+
+
+async def default_path(subs, response_field):
+    """Build models in the route, then let fastapi validate and encode them"""
+    content = [
+        Subscription(
+            arn=sub["SubscriptionArn"], endpoint=sub["Endpoint"], type=sub["Protocol"]
+        )
+        for sub in subs
+    ]
+    content = await serialize_response(field=response_field, response_content=content)
+    return JSONResponse(content).body
+
+
+def fast_path(subs):
+    return FastJSONResponse(
+        [
+            {
+                "arn": sub["SubscriptionArn"],
+                "endpoint": sub["Endpoint"],
+                "type": sub["Protocol"],
+            }
+            for sub in subs
+        ]
+    ).body
+
+
+async def time_paths(subs, response_field, number: int):
+    """Time both paths inside one running loop, so neither pays for loop setup"""
+    start = perf_counter()
+    for _ in range(number):
+        await default_path(subs, response_field)
+    default = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(number):
+        fast_path(subs)
+    fast = perf_counter() - start
+    return default, fast
+
+
+def main(count: int = 5000, number: int = 20):
+    response_field = next(
+        route.response_field
+        for route in sub_router.routes
+        if route.name == get_subscriptions.__name__
+    )
+    subs = fake_page(count)
+    assert json.loads(fast_path(subs)) == json.loads(
+        asyncio.run(default_path(subs, response_field))
+    ), "fast path no longer matches the documented schema"
+
+    default, fast = asyncio.run(time_paths(subs, response_field, number))
+    print(f"{count} subscriptions, {number} runs using {FastJSONResponse.__name__}")
+    print(f"default: {default / number * 1000:.2f}ms per response")
+    print(f"fast:    {fast / number * 1000:.2f}ms per response")
+    print(f"speedup: {default / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -5,6 +5,7 @@ from typing import Dict
 from typing import List
 from typing import Literal
 from typing import Optional
+from typing import Tuple
 
 import yaml
 from pydantic import BaseModel
@@ -12,6 +13,8 @@ from pydantic import BaseSettings
 from pydantic import Field
 from pydantic import validator
 
+from .utils.etag import make_etag
+
 
 class Config(BaseSettings):
     log_level: str = "info"
@@ -19,6 +22,23 @@ class Config(BaseSettings):
 
     sns_config_file: str = "./sns-config.yaml"
     do_not_delete: bool = False
+    # skip response_model validation on list endpoints and serialize straight to json
+    fast_json_responses: bool = False
+    # how long to serve a topic's subscriptions from cache before asking SNS again, 0 disables
+    subscription_cache_ttl: float = 0.0
+
+    # opentelemetry spans around each stage of a request, needs opentelemetry-api installed
+    enable_tracing: bool = False
+    # add a Server-Timing header with the same breakdown, for debugging without a collector
+    server_timing: bool = False
+
+    # assumed roles for topics in other accounts
+    sts_region: str = "us-east-1"
+    assume_role_duration: int = 3600
+    # refresh credentials this many seconds before they expire, keep it over botocore's
+    # 15 minute advisory refresh so botocore always finds fresh credentials in the cache
+    credential_refresh_window: int = 1200
+    credential_refresh_interval: float = 60.0
 
     # cors
     enable_cors: bool = True
@@ -29,10 +49,23 @@ class Config(BaseSettings):
     cors_origins: List[str] = ["*"]
     cors_origin_regex: Optional[str] = None
 
+    # per region circuit breaker around sns calls
+    breaker_failure_threshold: int = 5
+    breaker_latency_threshold: float = 5.0
+    breaker_reset_timeout: float = 30.0
+
     @property
     def sns_config(self) -> Dict[str, Any]:
         return load_sns_yaml(self.sns_config_file)
 
+    @property
+    def sns_roles(self) -> Dict[str, str]:
+        return load_sns_roles(self.sns_config_file)
+
+    @property
+    def sns_config_etags(self) -> Tuple[str, Dict[str, str]]:
+        return load_sns_etags(self.sns_config_file)
+
     @property
     def log_dict_config(self):
         """A logging dict config used to configure logging"""
@@ -121,12 +154,19 @@ class SNSConfig(BaseModel):
 
 
 @lru_cache
-def load_sns_yaml(file_path: str) -> Dict[str, SNSConfig]:
+def _read_sns_yaml(file_path: str) -> Dict[str, Any]:
     with open(file_path) as fh:
-        loaded = yaml.safe_load(fh)
+        return yaml.safe_load(fh)
+
+
+@lru_cache
+def load_sns_yaml(file_path: str) -> Dict[str, SNSConfig]:
     to_return = {}
-    for sns_dict in loaded["topics"]:
-        this_config = SNSConfig(**sns_dict)
+    for sns_dict in _read_sns_yaml(file_path)["topics"]:
+        # role_arn is only for us, it is loaded by load_sns_roles and never served
+        this_config = SNSConfig(
+            **{key: value for key, value in sns_dict.items() if key != "role_arn"}
+        )
         if this_config.name in to_return:
             raise InvalidSnsConfigError(
                 f"{this_config.name} already exists with arn {to_return[this_config.name].arn}"
@@ -135,6 +175,46 @@ def load_sns_yaml(file_path: str) -> Dict[str, SNSConfig]:
     return to_return
 
 
+@lru_cache
+def load_sns_roles(file_path: str) -> Dict[str, str]:
+    """The IAM role to assume for each topic name that has one
+
+    A topic's own role_arn wins, else the role for its account in account_roles. Kept
+    out of SNSConfig so the roles are never part of an api response.
+    """
+    loaded = _read_sns_yaml(file_path)
+    account_roles = loaded.get("account_roles", None) or {}
+    for account, role_arn in account_roles.items():
+        # unquoted account ids are read by yaml as ints, losing leading zeros (or as octal)
+        if not isinstance(account, str) or len(account) != 12 or not account.isdigit():
+            raise InvalidSnsConfigError(
+                f"account_roles key {account!r} must be a quoted 12 digit account id"
+            )
+        if not isinstance(role_arn, str):
+            raise InvalidSnsConfigError(
+                f"account_roles role for {account} must be an arn"
+            )
+
+    to_return = {}
+    for sns_dict, topic in zip(loaded["topics"], load_sns_yaml(file_path).values()):
+        role_arn = sns_dict.get("role_arn", None) or account_roles.get(topic.account)
+        if role_arn is not None:
+            to_return[topic.name] = role_arn
+    return to_return
+
+
+@lru_cache
+def load_sns_etags(file_path: str) -> Tuple[str, Dict[str, str]]:
+    """Etags for the loaded sns config, one for the whole listing and one per topic name
+
+    Cached alongside load_sns_yaml so they are only computed once per loaded config
+    """
+    topics = {name: topic.dict() for name, topic in load_sns_yaml(file_path).items()}
+    return make_etag(list(topics.values())), {
+        name: make_etag(topic) for name, topic in topics.items()
+    }
+
+
 @lru_cache()
 def get_config() -> Config:
     """Gets a config object from the env and returns it
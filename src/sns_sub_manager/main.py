@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_health import health
@@ -5,8 +7,14 @@ from starlette.responses import RedirectResponse
 
 from .config import get_config
 from .routes import ROUTERS
+from .utils.aws import close_aws_clients
+from .utils.aws import credential_refresher
+from .utils.aws import refresh_expiring_credentials
+from .utils.circuit_breaker import circuit_breakers
 from .utils.logging import get_logger
 from .utils.logging import setup_logger
+from .utils.tracing import TRACING_INSTALLED
+from .utils.tracing import TracingMiddleware
 
 
 # Setup the FastAPI app object
@@ -16,8 +24,9 @@ app = FastAPI(
     description="A REST API to manage SNS Queues",
 )
 
-# This adds a basic health check route for deploying in k8s. Right now, does no checks, just 200s
-app.add_api_route("/health", health([]))
+# This adds a basic health check route for deploying in k8s. Always 200s, but reports the
+# state of the per region circuit breakers around SNS
+app.add_api_route("/health", health([circuit_breakers]))
 for router in ROUTERS:
     app.include_router(router)
 
@@ -41,11 +50,35 @@ if config.enable_cors:
         options["allow_origins"] = config.cors_origins
     app.add_middleware(CORSMiddleware, **options)
 
+if config.enable_tracing and not TRACING_INSTALLED:
+    logger.warning(
+        "ENABLE_TRACING is set but opentelemetry-api isn't installed, no spans will be "
+        "recorded. Install the tracing extra to get them"
+    )
+
+if config.enable_tracing or config.server_timing:
+    logger.debug("Enabling request tracing, Server-Timing %s", config.server_timing)
+    app.add_middleware(TracingMiddleware, server_timing=config.server_timing)
+
 
 @app.on_event("startup")
 async def startup_tasks():  # pragma: no coverage
-    """Sets up our redis store and adds all the models to it"""
-    pass
+    """Assumes the roles for our topics and keeps their credentials fresh in the background"""
+    role_arns = set(config.sns_roles.values())
+    if role_arns:
+        await refresh_expiring_credentials(role_arns)
+        app.state.credential_refresher = asyncio.create_task(
+            credential_refresher(role_arns)
+        )
+
+
+@app.on_event("shutdown")
+async def shutdown_tasks():  # pragma: no coverage
+    """Stops refreshing credentials and closes our pooled aws clients"""
+    refresher = getattr(app.state, "credential_refresher", None)
+    if refresher is not None:
+        refresher.cancel()
+    await close_aws_clients()
 
 
 @app.get("/")
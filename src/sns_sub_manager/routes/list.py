@@ -1,32 +1,62 @@
 from typing import List
+from typing import Optional
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
+from fastapi import Response
 
 from ..config import Config
 from ..config import SNSConfig
 from ..config import get_config
+from ..utils.etag import etag_matches
+from ..utils.etag import not_modified
 from ..utils.logging import get_logger
+from ..utils.responses import FastJSONResponse
+from ..utils.tracing import get_route_class
+from ..utils.tracing import span
 
 
-list_router = APIRouter(prefix="/sns", tags=["sns"])
+list_router = APIRouter(prefix="/sns", tags=["sns"], route_class=get_route_class())
 
 
 @list_router.get("", response_model=List[SNSConfig])
 async def get_topics(
-    config: Config = Depends(get_config), logger=Depends(get_logger)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    config: Config = Depends(get_config),
+    logger=Depends(get_logger),
 ) -> List[SNSConfig]:
     """Return the topics managed by this api"""
+    etag, _ = config.sns_config_etags
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    if config.fast_json_responses:
+        with span("encode"):
+            return FastJSONResponse(
+                [topic.dict() for topic in config.sns_config.values()],
+                headers={"ETag": etag},
+            )
+    response.headers["ETag"] = etag
     return list(config.sns_config.values())
 
 
 @list_router.get("/{name}", response_model=SNSConfig)
 async def get_topic_by_name(
-    name: str, config: Config = Depends(get_config), logger=Depends(get_logger)
+    name: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    config: Config = Depends(get_config),
+    logger=Depends(get_logger),
 ) -> SNSConfig:
     """Return info about a single topic"""
     topic = config.sns_config.get(name, None)
     if topic is None:
         raise HTTPException(status_code=404, detail="Topic not found")
+    _, topic_etags = config.sns_config_etags
+    etag = topic_etags[name]
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return topic
@@ -1,8 +1,11 @@
 from typing import List
+from typing import Optional
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Header
 from fastapi import HTTPException
+from fastapi import Response
 
 from ..config import Config
 from ..config import SNSConfig
@@ -11,13 +14,21 @@ from ..schemas.subscribe import SubscribeOut
 from ..schemas.subscribe import SubscribeRequest
 from ..schemas.subscribe import Subscription
 from ..utils.aws import SNSExceptionError
-from ..utils.aws import get_topic_subscriptions
 from ..utils.aws import subscribe_to_topic as sub_to_topic
 from ..utils.aws import unsubscribe_from_topic
+from ..utils.circuit_breaker import RegionUnavailableError
+from ..utils.credentials import CredentialsUnavailableError
+from ..utils.etag import etag_matches
+from ..utils.etag import not_modified
+from ..utils.inventory import get_subscription_inventory
+from ..utils.inventory import invalidate_subscription_inventory
 from ..utils.logging import get_logger
+from ..utils.responses import FastJSONResponse
+from ..utils.tracing import get_route_class
+from ..utils.tracing import span
 
 
-sub_router = APIRouter(prefix="/sns", tags=["sns"])
+sub_router = APIRouter(prefix="/sns", tags=["sns"], route_class=get_route_class())
 
 
 @sub_router.post("/{name}/sub", response_model=SubscribeOut)
@@ -31,6 +42,7 @@ async def subscribe_to_topic(
     topic = config.sns_config.get(name, None)
     if topic is None:
         raise HTTPException(status_code=404, detail="Topic not found")
+    role_arn = config.sns_roles.get(name, None)
     try:
         if sub_req.subscription_details.attributes is None:
             response = await sub_to_topic(
@@ -38,6 +50,7 @@ async def subscribe_to_topic(
                 topic.arn,
                 sub_req.subscribtion_type,
                 sub_req.subscription_details.endpoint,
+                role_arn=role_arn,
             )
         else:
             response = await sub_to_topic(
@@ -45,8 +58,12 @@ async def subscribe_to_topic(
                 topic.arn,
                 sub_req.subscribtion_type,
                 sub_req.subscription_details.endpoint,
+                role_arn=role_arn,
                 **sub_req.subscription_details.attributes.dict(),
             )
+    except (RegionUnavailableError, CredentialsUnavailableError) as exc:
+        logger.warning("Failing fast for %s - %s", name, exc.msg)
+        raise HTTPException(status_code=503, detail=exc.msg) from None
     except SNSExceptionError as exc:
         logger.exception(
             "Exception when subscribing to %s - %s - %s", name, sub_req, exc
@@ -54,19 +71,28 @@ async def subscribe_to_topic(
         raise HTTPException(
             status_code=500, detail=f"Error when subscribing to SNS {exc.msg}"
         ) from None
+    invalidate_subscription_inventory(topic.arn)
     return SubscribeOut(subscription_arn=response["SubscriptionArn"], status="ok")
 
 
 @sub_router.get("/{name}/sub", response_model=List[Subscription])
 async def get_subscriptions(
-    name: str, config: Config = Depends(get_config), logger=Depends(get_logger)
+    name: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    config: Config = Depends(get_config),
+    logger=Depends(get_logger),
 ) -> List[Subscription]:
     """Get subscriptions for a topic"""
     topic = config.sns_config.get(name, None)
     if topic is None:
         raise HTTPException(status_code=404, detail="Topic not found")
+    role_arn = config.sns_roles.get(name, None)
     try:
-        subs = await get_topic_subscriptions(topic.region, topic.arn)
+        inventory = await get_subscription_inventory(topic.region, topic.arn, role_arn)
+    except (RegionUnavailableError, CredentialsUnavailableError) as exc:
+        logger.warning("Failing fast for %s - %s", name, exc.msg)
+        raise HTTPException(status_code=503, detail=exc.msg) from None
     except SNSExceptionError as exc:
         logger.exception(
             "Exception when trying to get subscriptions for %s - %s", name, exc
@@ -75,6 +101,23 @@ async def get_subscriptions(
             status_code=500,
             detail=f"Error when trying to get subscriptions for SNS {exc.msg}",
         ) from None
+    if etag_matches(if_none_match, inventory.etag):
+        return not_modified(inventory.etag)
+    subs = inventory.subscriptions
+    if config.fast_json_responses:
+        with span("encode"):
+            return FastJSONResponse(
+                [
+                    {
+                        "arn": sub["SubscriptionArn"],
+                        "endpoint": sub["Endpoint"],
+                        "type": sub["Protocol"],
+                    }
+                    for sub in subs
+                ],
+                headers={"ETag": inventory.etag},
+            )
+    response.headers["ETag"] = inventory.etag
     return [
         Subscription(
             arn=sub["SubscriptionArn"], endpoint=sub["Endpoint"], type=sub["Protocol"]
@@ -96,8 +139,12 @@ async def delete_subscription(
     topic = config.sns_config.get(name, None)
     if topic is None:
         raise HTTPException(status_code=404, detail="Topic not found")
+    role_arn = config.sns_roles.get(name, None)
     try:
-        await unsubscribe_from_topic(topic.region, sub_arn)
+        await unsubscribe_from_topic(topic.region, sub_arn, role_arn)
+    except (RegionUnavailableError, CredentialsUnavailableError) as exc:
+        logger.warning("Failing fast for %s - %s", name, exc.msg)
+        raise HTTPException(status_code=503, detail=exc.msg) from None
     except SNSExceptionError as exc:
         logger.exception(
             "Exception when unsubscribing %s from %s - %s", sub_arn, name, exc
@@ -105,4 +152,5 @@ async def delete_subscription(
         raise HTTPException(
             status_code=500, detail=f"Error when unsubscribing from SNS {exc.msg}"
         ) from None
+    invalidate_subscription_inventory(topic.arn)
     return {}
@@ -1,34 +1,110 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
+from time import time_ns
 from typing import Any
 from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import Optional
+from typing import Tuple
 
 from aiobotocore.session import AioSession
 from aiobotocore.session import get_session
 
+from ..config import get_config
+from .circuit_breaker import get_circuit_breaker
+from .credentials import RoleCredentialProvider
+from .credentials import roles_needing_refresh
+from .credentials import store_role_credentials
+from .logging import get_logger
+from .tracing import record_span
+from .tracing import span
+
 
 # This is a list of service names we can emulate with localstack during local testing and CI
 LOCALSTACK_SERVICES = (
-    os.environ.get("LOCALSTACK_SERVICES", "sqs,sns").lower().split(",")
+    os.environ.get("LOCALSTACK_SERVICES", "sqs,sns,sts").lower().split(",")
 )
 LOCALSTACK_PROFILE = os.environ.get("LOCALSTACK_PROFILE", "localstack")
 LOCALSTACK_ENDPOINT = os.environ.get("LOCALSTACK_ENDPOINT_URL", "http://localhost:4566")
 
+# (role arn, region, client type) -> an open client, shared between requests
+_CLIENTS: Dict[Tuple[Optional[str], str, str], Any] = {}
+
+
+@asynccontextmanager
+async def get_aws_client(region: str, client_type: str, role_arn: Optional[str] = None):
+    """Get a pooled client for a region, using an assumed role if role_arn is passed
+
+    Clients stay open after the with block, close_aws_clients closes them on shutdown
+    """
+    key = (role_arn, region, client_type)
+    if key not in _CLIENTS:
+        with span("client", f"{client_type} {region}"):
+            client = await _create_client(region, client_type, role_arn).__aenter__()
+        if key in _CLIENTS:
+            # another request made one while we were waiting
+            await client.__aexit__(None, None, None)
+        else:
+            _CLIENTS[key] = client
+    yield _CLIENTS[key]
 
-def get_aws_client(region: str, client_type: str):
-    if client_type in LOCALSTACK_SERVICES and LOCALSTACK_ENDPOINT != "":
-        return _get_localstack_client(region, client_type)
-    else:
-        session = get_session()
-        return session.create_client(client_type, region_name=region)
 
+def _create_client(region: str, client_type: str, role_arn: Optional[str]):
+    localstack = client_type in LOCALSTACK_SERVICES and LOCALSTACK_ENDPOINT != ""
+    session = AioSession() if localstack else get_session()
+    if role_arn is not None:
+        session.get_component("credential_provider").insert_before(
+            "env", RoleCredentialProvider(role_arn)
+        )
+    elif localstack:
+        session.set_credentials("test", "test")
+    kwargs = {"endpoint_url": LOCALSTACK_ENDPOINT} if localstack else {}
+    return session.create_client(client_type, region_name=region, **kwargs)
 
-def _get_localstack_client(region: str, client_type: str):
-    session = AioSession()
-    session.set_credentials("test", "test")
-    return session.create_client(
-        client_type, region_name=region, endpoint_url=LOCALSTACK_ENDPOINT
+
+async def close_aws_clients() -> None:
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        await client.__aexit__(None, None, None)
+
+
+async def refresh_role_credentials(role_arn: str) -> None:
+    """Assume a role with the default credentials and cache the result"""
+    config = get_config()
+    async with get_aws_client(region=config.sts_region, client_type="sts") as sts:
+        with span("sts_assume_role"):
+            response = await sts.assume_role(
+                RoleArn=role_arn,
+                RoleSessionName=config.app_name,
+                DurationSeconds=config.assume_role_duration,
+            )
+    store_role_credentials(role_arn, response["Credentials"])
+
+
+async def refresh_expiring_credentials(role_arns: Iterable[str]) -> None:
+    """Re-assume any roles whose credentials are missing or close to expiring"""
+    to_refresh = roles_needing_refresh(
+        role_arns, get_config().credential_refresh_window
     )
+    results = await asyncio.gather(
+        *(refresh_role_credentials(role_arn) for role_arn in to_refresh),
+        return_exceptions=True,
+    )
+    for role_arn, result in zip(to_refresh, results):
+        if isinstance(result, Exception):
+            get_logger().error("Unable to assume role %s - %s", role_arn, result)
+
+
+async def credential_refresher(role_arns: Iterable[str]) -> None:
+    """Keep assumed role credentials fresh so requests never wait on sts"""
+    role_arns = list(role_arns)
+    interval = get_config().credential_refresh_interval
+    while True:
+        await refresh_expiring_credentials(role_arns)
+        await asyncio.sleep(interval)
 
 
 async def subscribe_to_topic(
@@ -36,6 +112,7 @@ async def subscribe_to_topic(
     topic_arn: str,
     subscription_type: str,
     endpoint: str,
+    role_arn: Optional[str] = None,
     **subscription_attributes,
 ) -> Dict[str, Any]:
     """Trigger a subscription to a SNS topic via the aws api
@@ -49,15 +126,18 @@ async def subscribe_to_topic(
     Returns:
         str: subscription arn
     """
-    async with get_aws_client(region=region, client_type="sns") as sns_client:
+    async with get_circuit_breaker(region).guard(), get_aws_client(
+        region=region, client_type="sns", role_arn=role_arn
+    ) as sns_client:
         try:
-            response = await sns_client.subscribe(
-                TopicArn=topic_arn,
-                Protocol=subscription_type,
-                Endpoint=endpoint,
-                Attributes=subscription_attributes,
-                ReturnSubscriptionArn=True,
-            )
+            with span("sns_subscribe"):
+                response = await sns_client.subscribe(
+                    TopicArn=topic_arn,
+                    Protocol=subscription_type,
+                    Endpoint=endpoint,
+                    Attributes=subscription_attributes,
+                    ReturnSubscriptionArn=True,
+                )
         except sns_client.exceptions.SubscriptionLimitExceededException as exc:
             raise SNSExceptionError(
                 f"SubscriptionLimitExceededException: while subscribing {exc.msg}"
@@ -89,7 +169,9 @@ async def subscribe_to_topic(
     return response
 
 
-async def unsubscribe_from_topic(region: str, subscription_arn: str) -> None:
+async def unsubscribe_from_topic(
+    region: str, subscription_arn: str, role_arn: Optional[str] = None
+) -> None:
     """Unsubscribe from a SNS topic
 
     Args:
@@ -97,11 +179,14 @@ async def unsubscribe_from_topic(region: str, subscription_arn: str) -> None:
 
     Returns:
     """
-    async with get_aws_client(region=region, client_type="sns") as sns_client:
+    async with get_circuit_breaker(region).guard(), get_aws_client(
+        region=region, client_type="sns", role_arn=role_arn
+    ) as sns_client:
         try:
-            await sns_client.unsubscribe(
-                SubscriptionArn=subscription_arn,
-            )
+            with span("sns_unsubscribe"):
+                await sns_client.unsubscribe(
+                    SubscriptionArn=subscription_arn,
+                )
         except sns_client.exceptions.InvalidParameterException as exc:
             raise SNSExceptionError(
                 f"InvalidParameterException: while unsubscribing {exc.msg}"
@@ -124,7 +209,9 @@ async def unsubscribe_from_topic(region: str, subscription_arn: str) -> None:
             ) from exc
 
 
-async def get_topic_subscriptions(region: str, topic_arn: str) -> List[Dict[str, Any]]:
+async def get_topic_subscriptions(
+    region: str, topic_arn: str, role_arn: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """Get a topics subscriptions
 
     Args:
@@ -135,13 +222,22 @@ async def get_topic_subscriptions(region: str, topic_arn: str) -> List[Dict[str,
         List[Dict[str, Any]]: [description]
     """
     to_return = []
-    async with get_aws_client(region=region, client_type="sns") as sns_client:
+    async with get_circuit_breaker(region).guard() as call_timer, get_aws_client(
+        region=region, client_type="sns", role_arn=role_arn
+    ) as sns_client:
         try:
             paginator = sns_client.get_paginator("list_subscriptions_by_topic")
+            page = 0
+            page_start = time_ns()
             async for response in paginator.paginate(
                 TopicArn=topic_arn,
             ):
+                page += 1
+                record_span("sns_page", page_start, time_ns(), f"page {page}")
+                # each page is held to the breaker's latency threshold, not the listing
+                call_timer.lap()
                 to_return += response["Subscriptions"]
+                page_start = time_ns()
         except sns_client.exceptions.InvalidParameterException as exc:
             raise SNSExceptionError(
                 f"InvalidParameterException: while unsubscribing {exc.msg}"
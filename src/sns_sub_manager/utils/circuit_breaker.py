@@ -0,0 +1,238 @@
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+from botocore.exceptions import ClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+from botocore.exceptions import HTTPClientError
+
+from ..config import get_config
+from .logging import get_logger
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Error codes that mean the region is struggling, as opposed to the request being bad
+REGION_ERROR_CODES = (
+    "InternalError",
+    "InternalErrorException",
+    "ServiceUnavailable",
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestTimeout",
+)
+
+
+class CircuitBreaker:
+    """Tracks the health of calls to a single AWS region
+
+    Opens after failure_threshold consecutive failures (a call slower than
+    latency_threshold counts as a failure). While open, calls fail fast. After
+    reset_timeout seconds a single probe call is let through; if it succeeds the
+    breaker closes, otherwise it opens again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        latency_threshold: float = 5.0,
+        reset_timeout: float = 30.0,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = CLOSED
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_rejections = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self) -> bool:
+        """Raise RegionUnavailableError if this call should not be attempted
+
+        Returns:
+            bool: True if this call is the half open probe
+        """
+        state = self.state
+        if state == CLOSED:
+            return False
+        if state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self.total_rejections += 1
+        raise RegionUnavailableError(
+            f"Circuit breaker for {self.name} is {state}, not calling SNS"
+        )
+
+    def record_success(self, elapsed: float, probe: bool = False) -> None:
+        if elapsed > self.latency_threshold:
+            get_logger().warning(
+                "SNS call in %s took %.2fs, over the %.2fs latency threshold",
+                self.name,
+                elapsed,
+                self.latency_threshold,
+            )
+            self.record_failure(probe)
+            return
+        if self._state == CLOSED:
+            self.consecutive_failures = 0
+            return
+        if not probe:
+            # A call that started before the breaker opened, only the probe can close it
+            return
+        get_logger().info("Closing circuit breaker for %s", self.name)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+        self.consecutive_failures = 0
+
+    def record_failure(self, probe: bool = False) -> None:
+        self.consecutive_failures += 1
+        self.total_failures += 1
+        if probe or (
+            self._state == CLOSED
+            and self.consecutive_failures >= self.failure_threshold
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        get_logger().warning(
+            "Opening circuit breaker for %s after %d consecutive failures",
+            self.name,
+            self.consecutive_failures,
+        )
+        self._state = OPEN
+        self._opened_at = monotonic()
+        self._probe_in_flight = False
+        self.times_opened += 1
+
+    @asynccontextmanager
+    async def guard(self):
+        """Wrap a call to aws, recording its outcome against this breaker
+
+        Yields a CallTimer, call lap() on it between calls that should each be held to
+        the latency threshold, like the pages of a paginator
+        """
+        probe = self.before_call()
+        timer = CallTimer()
+        try:
+            yield timer
+        except Exception as exc:
+            if is_region_failure(exc):
+                self.record_failure(probe)
+            elif region_answered(exc):
+                # The region answered, just not the way the caller wanted
+                self.record_success(timer.slowest(), probe)
+            elif probe:
+                # Failed before reaching the region, let the next call probe instead
+                self._probe_in_flight = False
+            raise
+        except BaseException:
+            # Cancelled, don't hold the probe slot forever
+            if probe:
+                self._probe_in_flight = False
+            raise
+        else:
+            self.record_success(timer.slowest(), probe)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "total_failures": self.total_failures,
+            "total_rejections": self.total_rejections,
+            "times_opened": self.times_opened,
+        }
+
+
+class CallTimer:
+    """Tracks the slowest of the calls made under a breaker guard"""
+
+    def __init__(self):
+        self._lap_start = monotonic()
+        self._slowest = 0.0
+
+    def lap(self) -> None:
+        now = monotonic()
+        self._slowest = max(self._slowest, now - self._lap_start)
+        self._lap_start = now
+
+    def slowest(self) -> float:
+        return max(self._slowest, monotonic() - self._lap_start)
+
+
+def is_region_failure(exc: BaseException) -> bool:
+    """Is this exception (or what caused it) a sign the region is unhealthy?"""
+    while exc is not None:
+        if isinstance(
+            exc, (BotoConnectionError, HTTPClientError, asyncio.TimeoutError)
+        ):
+            return True
+        if isinstance(exc, ClientError):
+            error = exc.response.get("Error", {})
+            status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            return status >= 500 or error.get("Code") in REGION_ERROR_CODES
+        exc = exc.__cause__
+    return False
+
+
+def region_answered(exc: BaseException) -> bool:
+    """Did this exception (or what caused it) come back from aws?"""
+    while exc is not None:
+        if isinstance(exc, ClientError):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(region: str) -> CircuitBreaker:
+    """Get the circuit breaker for a region, creating it on first use"""
+    if region not in _BREAKERS:
+        config = get_config()
+        _BREAKERS[region] = CircuitBreaker(
+            region,
+            failure_threshold=config.breaker_failure_threshold,
+            latency_threshold=config.breaker_latency_threshold,
+            reset_timeout=config.breaker_reset_timeout,
+        )
+    return _BREAKERS[region]
+
+
+def circuit_breakers():
+    """Health check condition reporting the breaker state of every configured region
+
+    Always passes, an open breaker in one region shouldn't take the whole service out
+    """
+    regions = {topic.region for topic in get_config().sns_config.values()}
+    return {
+        "circuit_breakers": {
+            region: get_circuit_breaker(region).snapshot() for region in sorted(regions)
+        }
+    }
+
+
+class RegionUnavailableError(Exception):
+    def __init__(self, msg: str):
+        super().__init__(msg)
+        self.msg = msg
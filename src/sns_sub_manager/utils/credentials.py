@@ -0,0 +1,94 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+
+from aiobotocore.credentials import AioRefreshableCredentials
+from botocore.credentials import CredentialProvider
+
+
+# role arn -> the last credentials we got from sts for it, in botocore's metadata format
+_ROLE_CREDENTIALS: Dict[str, Dict[str, str]] = {}
+# role arn -> the credentials object shared by every client using that role
+_REFRESHABLE: Dict[str, AioRefreshableCredentials] = {}
+
+
+def store_role_credentials(role_arn: str, sts_credentials: Dict[str, Any]) -> None:
+    """Cache the Credentials from an sts AssumeRole response"""
+    _ROLE_CREDENTIALS[role_arn] = {
+        "access_key": sts_credentials["AccessKeyId"],
+        "secret_key": sts_credentials["SecretAccessKey"],
+        "token": sts_credentials["SessionToken"],
+        "expiry_time": sts_credentials["Expiration"].isoformat(),
+    }
+
+
+def roles_needing_refresh(role_arns: Iterable[str], window: float) -> List[str]:
+    """Roles with no cached credentials, or credentials expiring within window seconds"""
+    refresh_before = datetime.now(timezone.utc) + timedelta(seconds=window)
+    return [
+        role_arn
+        for role_arn in role_arns
+        if role_arn not in _ROLE_CREDENTIALS
+        or datetime.fromisoformat(_ROLE_CREDENTIALS[role_arn]["expiry_time"])
+        <= refresh_before
+    ]
+
+
+def get_role_credentials(role_arn: str) -> AioRefreshableCredentials:
+    """Get credentials for a role to hand to a client
+
+    These never call sts themselves. When botocore decides they need refreshing it just
+    re-reads our cache, which is kept fresh in the background by credential_refresher.
+
+    Raises:
+        CredentialsUnavailableError: if the role hasn't been assumed yet, or (on refresh)
+            its credentials expired because sts kept failing
+    """
+    if role_arn not in _ROLE_CREDENTIALS:
+        raise CredentialsUnavailableError(
+            f"No credentials for {role_arn} yet, not calling SNS"
+        )
+    if role_arn not in _REFRESHABLE:
+
+        async def _from_cache():
+            cached = _ROLE_CREDENTIALS[role_arn]
+            # sts has been failing for a while, fail fast rather than hand back
+            # expired credentials for botocore to choke on
+            if datetime.fromisoformat(cached["expiry_time"]) <= datetime.now(
+                timezone.utc
+            ):
+                raise CredentialsUnavailableError(
+                    f"Credentials for {role_arn} have expired, not calling SNS"
+                )
+            return cached
+
+        _REFRESHABLE[role_arn] = AioRefreshableCredentials.create_from_metadata(
+            metadata=_ROLE_CREDENTIALS[role_arn],
+            refresh_using=_from_cache,
+            method="sts-assume-role",
+        )
+    return _REFRESHABLE[role_arn]
+
+
+class RoleCredentialProvider(CredentialProvider):
+    """Hands a session the cached credentials for a role, registered ahead of the env"""
+
+    METHOD = "sns-sub-manager-assume-role"
+    CANONICAL_NAME = "sns-sub-manager-assume-role"
+
+    def __init__(self, role_arn: str):
+        super().__init__()
+        self.role_arn = role_arn
+
+    async def load(self) -> AioRefreshableCredentials:
+        return get_role_credentials(self.role_arn)
+
+
+class CredentialsUnavailableError(Exception):
+    def __init__(self, msg: str):
+        super().__init__(msg)
+        self.msg = msg
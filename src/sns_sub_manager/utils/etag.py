@@ -0,0 +1,31 @@
+import json
+from hashlib import sha256
+from typing import Any
+from typing import Optional
+
+from fastapi import Response
+
+
+def make_etag(content: Any) -> str:
+    """Make a strong etag from a content hash of json serializable content"""
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{sha256(encoded.encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Does an If-None-Match header match this etag?
+
+    If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    """
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
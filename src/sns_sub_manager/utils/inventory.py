@@ -0,0 +1,54 @@
+from time import monotonic
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+
+from ..config import get_config
+from .aws import get_topic_subscriptions
+from .etag import make_etag
+
+
+class SubscriptionInventory(NamedTuple):
+    subscriptions: List[Dict[str, Any]]
+    etag: str
+    fetched_at: float
+
+
+# topic arn -> the last subscriptions we fetched from SNS for it
+_INVENTORY: Dict[str, SubscriptionInventory] = {}
+
+
+async def get_subscription_inventory(
+    region: str, topic_arn: str, role_arn: Optional[str] = None
+) -> SubscriptionInventory:
+    """Get a topics subscriptions, from cache if they were fetched within subscription_cache_ttl
+
+    Args:
+        region (str): region of the topic
+        topic_arn (str): arn of the topic
+        role_arn (Optional[str]): role to assume to list the subscriptions
+
+    Returns:
+        SubscriptionInventory: the subscriptions and an etag from a hash of them
+    """
+    ttl = get_config().subscription_cache_ttl
+    cached = _INVENTORY.get(topic_arn, None)
+    if cached is not None and monotonic() - cached.fetched_at < ttl:
+        return cached
+
+    subscriptions = await get_topic_subscriptions(region, topic_arn, role_arn)
+    inventory = SubscriptionInventory(
+        subscriptions=subscriptions,
+        etag=make_etag(subscriptions),
+        fetched_at=monotonic(),
+    )
+    if ttl > 0:
+        _INVENTORY[topic_arn] = inventory
+    return inventory
+
+
+def invalidate_subscription_inventory(topic_arn: str) -> None:
+    """Drop a topics cached subscriptions, call after changing them"""
+    _INVENTORY.pop(topic_arn, None)
@@ -0,0 +1,14 @@
+from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+# Returning one of these from a route skips the response_model validation and the
+# jsonable_encoder walk, so only hand it plain dicts that already match the schema.
+# Uses orjson if it is installed (pip install sns-sub-manager[fast]), else the stdlib json.
+FastJSONResponse = JSONResponse if orjson is None else ORJSONResponse
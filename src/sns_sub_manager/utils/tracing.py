@@ -0,0 +1,180 @@
+import asyncio
+from contextlib import contextmanager
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import lru_cache
+from functools import wraps
+from time import time_ns
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Type
+
+from fastapi import Request
+from fastapi import Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+from ..config import get_config
+
+
+try:
+    from opentelemetry import trace
+except ImportError:  # pragma: no cover
+    trace = None
+
+TRACING_INSTALLED = trace is not None
+
+
+class Timing(NamedTuple):
+    name: str
+    start: int
+    end: int
+    desc: Optional[str] = None
+
+
+# Timings collected for the current request, None when not collecting
+_TIMINGS: ContextVar[Optional[List[Timing]]] = ContextVar("timings", default=None)
+# Marks TracedRoute uses to work out how long validation and encoding took
+_ROUTE_MARKS: ContextVar[Optional[Dict[str, int]]] = ContextVar(
+    "route_marks", default=None
+)
+
+
+@lru_cache()
+def get_tracer():
+    """Get an opentelemetry tracer if tracing is enabled and opentelemetry-api is installed
+
+    Without an opentelemetry sdk configured this is opentelemetry's own no-op tracer
+    """
+    if trace is None or not get_config().enable_tracing:
+        return None
+    return trace.get_tracer(get_config().app_name)
+
+
+@contextmanager
+def span(name: str, desc: Optional[str] = None):
+    """Time a stage of the request as a span and a Server-Timing entry"""
+    tracer = get_tracer()
+    start = time_ns()
+    with nullcontext() if tracer is None else tracer.start_as_current_span(name):
+        try:
+            yield
+        finally:
+            _record_timing(Timing(name, start, time_ns(), desc))
+
+
+def record_span(name: str, start: int, end: int, desc: Optional[str] = None) -> None:
+    """Record a stage that has already happened, for when a with block doesn't fit"""
+    tracer = get_tracer()
+    if tracer is not None:
+        tracer.start_span(name, start_time=start).end(end_time=end)
+    _record_timing(Timing(name, start, end, desc))
+
+
+def _record_timing(timing: Timing) -> None:
+    timings = _TIMINGS.get()
+    if timings is not None:
+        timings.append(timing)
+
+
+def server_timing_header(timings: List[Timing]) -> str:
+    entries = []
+    for timing in timings:
+        entry = timing.name
+        if timing.desc is not None:
+            entry += f'; desc="{timing.desc}"'
+        entries.append(f"{entry}; dur={(timing.end - timing.start) / 1e6:.3f}")
+    return ", ".join(entries)
+
+
+class TracingMiddleware:
+    """Collects the timings for each request, adding them in a Server-Timing header
+
+    Pure asgi so the timings context var is shared with the routes
+    """
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = []
+        token = _TIMINGS.set(timings)
+        start = time_ns()
+
+        async def send_with_timings(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    server_timing_header(timings + [Timing("total", start, time_ns())]),
+                )
+            await send(message)
+
+        try:
+            with span("request", scope["path"]):
+                await self.app(scope, receive, send_with_timings)
+        finally:
+            _TIMINGS.reset(token)
+
+
+class TracedRoute(APIRoute):
+    """APIRoute that times request validation, the endpoint and response encoding"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router rebuilds routes from the already traced endpoint
+        if asyncio.iscoroutinefunction(endpoint) and not getattr(
+            endpoint, "_traced", False
+        ):
+            endpoint = _traced_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def traced_handler(request: Request) -> Response:
+            marks = {"start": time_ns()}
+            token = _ROUTE_MARKS.set(marks)
+            try:
+                response = await handler(request)
+            finally:
+                _ROUTE_MARKS.reset(token)
+            # endpoints returning a response have already encoded it themselves
+            if "endpoint_end" in marks and not marks.get("raw_response", False):
+                record_span("encode", marks["endpoint_end"], time_ns())
+            return response
+
+        return traced_handler
+
+
+def _traced_endpoint(endpoint: Callable) -> Callable:
+    @wraps(endpoint)
+    async def traced(*args, **kwargs):
+        marks = _ROUTE_MARKS.get()
+        if marks is not None:
+            record_span("validate", marks["start"], time_ns())
+        try:
+            with span("endpoint"):
+                response = await endpoint(*args, **kwargs)
+        finally:
+            if marks is not None:
+                marks["endpoint_end"] = time_ns()
+        if marks is not None:
+            marks["raw_response"] = isinstance(response, Response)
+        return response
+
+    traced._traced = True
+    return traced
+
+
+def get_route_class() -> Type[APIRoute]:
+    """The route class for our routers, only timing requests if something will use it"""
+    config = get_config()
+    return TracedRoute if config.enable_tracing or config.server_timing else APIRoute
@@ -0,0 +1,100 @@
+"""Shared fixtures, running the app against a local moto stand-in for sns and sts."""
+
+import os
+import socket
+from pathlib import Path
+from typing import Iterator
+from urllib.request import Request
+from urllib.request import urlopen
+
+import boto3
+import pytest
+from moto.server import ThreadedMotoServer
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+MOTO_PORT = _free_port()
+MOTO_ENDPOINT = f"http://127.0.0.1:{MOTO_PORT}"
+SNS_CONFIG_FILE = Path(__file__).parent / "sns-config.yaml"
+BETA_ROLE_ARN = "arn:aws:iam::210987654321:role/sns-manager"
+
+# sns_sub_manager reads these when it is imported, so set them before any test does
+os.environ["LOCALSTACK_ENDPOINT_URL"] = MOTO_ENDPOINT
+os.environ["SNS_CONFIG_FILE"] = str(SNS_CONFIG_FILE)
+
+
+@pytest.fixture(scope="session")
+def moto_server() -> Iterator[str]:
+    """Fixture running a moto server for the whole test session."""
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=MOTO_PORT)
+    server.start()
+    yield MOTO_ENDPOINT
+    server.stop()
+
+
+@pytest.fixture(autouse=True)
+def reset_state() -> Iterator[None]:
+    """Fixture clearing the config and the module level caches around each test."""
+    from sns_sub_manager.config import get_config
+    from sns_sub_manager.utils import aws
+    from sns_sub_manager.utils import circuit_breaker
+    from sns_sub_manager.utils import credentials
+    from sns_sub_manager.utils import inventory
+
+    caches = (
+        aws._CLIENTS,
+        circuit_breaker._BREAKERS,
+        credentials._ROLE_CREDENTIALS,
+        credentials._REFRESHABLE,
+        inventory._INVENTORY,
+    )
+    get_config.cache_clear()
+    yield
+    get_config.cache_clear()
+    for cache in caches:
+        cache.clear()
+
+
+@pytest.fixture
+def sns(moto_server: str):
+    """Fixture for a boto3 sns client on a freshly reset moto, with the test topics.
+
+    beta lives in another account, so it can only be reached through the assumed role
+    """
+    urlopen(Request(f"{moto_server}/moto-api/reset", method="POST"))  # noqa: S310
+    options = {
+        "endpoint_url": moto_server,
+        "aws_access_key_id": "test",
+        "aws_secret_access_key": "test",
+    }
+    client = boto3.client("sns", region_name="us-east-1", **options)
+    client.create_topic(Name="alpha")
+
+    assumed = boto3.client("sts", region_name="us-east-1", **options).assume_role(
+        RoleArn=BETA_ROLE_ARN, RoleSessionName="setup"
+    )["Credentials"]
+    boto3.client(
+        "sns",
+        region_name="us-west-2",
+        endpoint_url=moto_server,
+        aws_access_key_id=assumed["AccessKeyId"],
+        aws_secret_access_key=assumed["SecretAccessKey"],
+        aws_session_token=assumed["SessionToken"],
+    ).create_topic(Name="beta")
+    return client
+
+
+@pytest.fixture
+def client(sns):
+    """Fixture for a test client on the app, started up so clients are pooled."""
+    from fastapi.testclient import TestClient
+
+    from sns_sub_manager.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
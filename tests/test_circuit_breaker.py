@@ -0,0 +1,208 @@
+"""Test cases for the per region circuit breaker."""
+
+import asyncio
+import logging
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.exceptions import EndpointConnectionError
+from fastapi import HTTPException
+from fastapi import Response
+
+from sns_sub_manager.config import Config
+from sns_sub_manager.routes.subscribe import get_subscriptions
+from sns_sub_manager.utils import circuit_breaker
+from sns_sub_manager.utils.aws import SNSExceptionError
+from sns_sub_manager.utils.circuit_breaker import CLOSED
+from sns_sub_manager.utils.circuit_breaker import HALF_OPEN
+from sns_sub_manager.utils.circuit_breaker import OPEN
+from sns_sub_manager.utils.circuit_breaker import CircuitBreaker
+from sns_sub_manager.utils.circuit_breaker import RegionUnavailableError
+from sns_sub_manager.utils.circuit_breaker import is_region_failure
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    """Fixture replacing the breaker's clock with one the test moves by hand."""
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "monotonic", fake)
+    return fake
+
+
+@pytest.fixture
+def breaker(clock: FakeClock) -> CircuitBreaker:
+    """Fixture for a breaker that opens after two failures."""
+    return CircuitBreaker(
+        "us-east-1", failure_threshold=2, latency_threshold=1.0, reset_timeout=30.0
+    )
+
+
+def client_error(code: str, status: int) -> ClientError:
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        "Subscribe",
+    )
+
+
+async def failing_call(breaker: CircuitBreaker) -> None:
+    with pytest.raises(EndpointConnectionError):
+        async with breaker.guard():
+            raise EndpointConnectionError(endpoint_url="http://sns")
+
+
+async def working_call(breaker: CircuitBreaker, clock: FakeClock, took=0.1) -> None:
+    async with breaker.guard():
+        clock.now += took
+
+
+def test_opens_after_consecutive_failures(breaker: CircuitBreaker) -> None:
+    """It opens after failure_threshold failures and then fails fast."""
+    asyncio.run(failing_call(breaker))
+    assert breaker.state == CLOSED
+    asyncio.run(failing_call(breaker))
+    assert breaker.state == OPEN
+    with pytest.raises(RegionUnavailableError):
+        breaker.before_call()
+    assert breaker.snapshot()["total_rejections"] == 1
+
+
+def test_success_resets_failure_count(
+    breaker: CircuitBreaker, clock: FakeClock
+) -> None:
+    """It only counts consecutive failures."""
+    asyncio.run(failing_call(breaker))
+    asyncio.run(working_call(breaker, clock))
+    asyncio.run(failing_call(breaker))
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_success_closes(
+    breaker: CircuitBreaker, clock: FakeClock
+) -> None:
+    """It lets a single probe through after reset_timeout and closes if it works."""
+    asyncio.run(failing_call(breaker))
+    asyncio.run(failing_call(breaker))
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+
+    async def probe_with_concurrent_call() -> None:
+        async with breaker.guard():
+            with pytest.raises(RegionUnavailableError):
+                breaker.before_call()
+
+    asyncio.run(probe_with_concurrent_call())
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_failure_reopens(
+    breaker: CircuitBreaker, clock: FakeClock
+) -> None:
+    """It opens again if the probe fails."""
+    asyncio.run(failing_call(breaker))
+    asyncio.run(failing_call(breaker))
+    clock.now += 30
+    asyncio.run(failing_call(breaker))
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+
+
+def test_stale_success_does_not_close(
+    breaker: CircuitBreaker, clock: FakeClock
+) -> None:
+    """A call that started before the breaker opened can't close it."""
+
+    async def slow_call_while_opening() -> None:
+        async with breaker.guard():
+            await failing_call(breaker)
+            await failing_call(breaker)
+
+    asyncio.run(slow_call_while_opening())
+    assert breaker.state == OPEN
+
+
+def test_slow_call_counts_as_failure(breaker: CircuitBreaker, clock: FakeClock) -> None:
+    """Calls over the latency threshold count as failures."""
+    asyncio.run(working_call(breaker, clock, took=2.0))
+    asyncio.run(working_call(breaker, clock, took=2.0))
+    assert breaker.state == OPEN
+
+
+def test_latency_is_per_lap(breaker: CircuitBreaker, clock: FakeClock) -> None:
+    """Each lap, like a page of a listing, is held to the threshold on its own."""
+
+    async def paginated_call() -> None:
+        async with breaker.guard() as timer:
+            for _ in range(10):
+                clock.now += 0.5
+                timer.lap()
+
+    for _ in range(3):
+        asyncio.run(paginated_call())
+    assert breaker.state == CLOSED
+    assert breaker.total_failures == 0
+
+
+def test_client_errors_are_not_failures(breaker: CircuitBreaker) -> None:
+    """Errors that mean the request was bad don't count against the region."""
+
+    async def bad_request() -> None:
+        with pytest.raises(SNSExceptionError):
+            async with breaker.guard():
+                raise SNSExceptionError("bad") from client_error(
+                    "InvalidParameter", 400
+                )
+
+    for _ in range(3):
+        asyncio.run(bad_request())
+    assert breaker.state == CLOSED
+
+
+@pytest.mark.parametrize(
+    "exc,expected",
+    [
+        (EndpointConnectionError(endpoint_url="http://sns"), True),
+        (asyncio.TimeoutError(), True),
+        (client_error("InternalErrorException", 500), True),
+        (client_error("Throttling", 400), True),
+        (client_error("InvalidParameter", 400), False),
+        (client_error("NotFound", 404), False),
+        (ValueError("nope"), False),
+    ],
+)
+def test_is_region_failure(exc: Exception, expected: bool) -> None:
+    """It tells region trouble apart from bad requests, following __cause__."""
+    assert is_region_failure(exc) is expected
+    wrapped = SNSExceptionError("wrapped")
+    wrapped.__cause__ = exc
+    assert is_region_failure(wrapped) is expected
+
+
+def test_open_breaker_is_a_503(
+    tmp_path, monkeypatch: pytest.MonkeyPatch, breaker: CircuitBreaker
+) -> None:
+    """Routes turn an open breaker into a 503 without calling SNS."""
+    sns_config = tmp_path / "sns-config.yaml"
+    sns_config.write_text("topics:\n  - arn: arn:aws:sns:us-east-1:123456789012:test\n")
+    breaker.record_failure()
+    breaker.record_failure()
+    monkeypatch.setitem(circuit_breaker._BREAKERS, "us-east-1", breaker)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(
+            get_subscriptions(
+                name="test",
+                response=Response(),
+                if_none_match=None,
+                config=Config(sns_config_file=str(sns_config)),
+                logger=logging.getLogger("test"),
+            )
+        )
+    assert exc_info.value.status_code == 503
@@ -0,0 +1,39 @@
+"""Test cases for loading the sns config file."""
+
+import pytest
+
+from sns_sub_manager.config import InvalidSnsConfigError
+from sns_sub_manager.config import load_sns_roles
+
+
+TOPICS = """
+topics:
+  - arn: arn:aws:sns:us-east-1:012345670123:alpha
+  - arn: arn:aws:sns:us-east-1:123456789012:beta
+    role_arn: arn:aws:iam::123456789012:role/beta
+  - arn: arn:aws:sns:us-east-1:123456789012:gamma
+"""
+
+
+def test_roles_by_account_and_topic(tmp_path) -> None:
+    """A topic's own role wins over the role for its account."""
+    config_file = tmp_path / "sns-config.yaml"
+    config_file.write_text(
+        'account_roles:\n  "012345670123": arn:aws:iam::012345670123:role/mgr\n'
+        + TOPICS
+    )
+    assert load_sns_roles(str(config_file)) == {
+        "alpha": "arn:aws:iam::012345670123:role/mgr",
+        "beta": "arn:aws:iam::123456789012:role/beta",
+    }
+
+
+@pytest.mark.parametrize("account", ["012345670123", "000000000012", "12345"])
+def test_account_ids_must_be_quoted(tmp_path, account: str) -> None:
+    """It rejects account ids yaml would mangle into ints, and ones that aren't ids."""
+    config_file = tmp_path / "sns-config.yaml"
+    config_file.write_text(
+        f"account_roles:\n  {account}: arn:aws:iam::{account}:role/mgr\n" + TOPICS
+    )
+    with pytest.raises(InvalidSnsConfigError):
+        load_sns_roles(str(config_file))
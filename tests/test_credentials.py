@@ -0,0 +1,103 @@
+"""Test cases for assumed role credentials and pooled clients, against moto."""
+
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from fastapi.testclient import TestClient
+
+from sns_sub_manager.main import app
+from sns_sub_manager.utils import aws
+from sns_sub_manager.utils import credentials
+from sns_sub_manager.utils.circuit_breaker import CLOSED
+from sns_sub_manager.utils.circuit_breaker import get_circuit_breaker
+from sns_sub_manager.utils.credentials import roles_needing_refresh
+from sns_sub_manager.utils.credentials import store_role_credentials
+
+from .conftest import BETA_ROLE_ARN
+
+
+def sts_credentials(expires_in: timedelta):
+    return {
+        "AccessKeyId": "AKIA",
+        "SecretAccessKey": "secret",
+        "SessionToken": "token",
+        "Expiration": datetime.now(timezone.utc) + expires_in,
+    }
+
+
+def test_roles_needing_refresh() -> None:
+    """It wants roles with no credentials, or credentials expiring within the window."""
+    store_role_credentials("soon", sts_credentials(timedelta(minutes=10)))
+    store_role_credentials("later", sts_credentials(timedelta(hours=1)))
+
+    roles = ["soon", "later", "missing"]
+    assert roles_needing_refresh(roles, window=1200) == ["soon", "missing"]
+    assert roles_needing_refresh(roles, window=300) == ["missing"]
+
+
+def test_roles_assumed_on_startup_and_cached(client) -> None:
+    """It assumes roles at startup and doesn't call sts again while they are fresh."""
+    cached = credentials._ROLE_CREDENTIALS[BETA_ROLE_ARN]
+    assert datetime.fromisoformat(cached["expiry_time"]) > datetime.now(timezone.utc)
+
+    client.portal.call(aws.refresh_expiring_credentials, [BETA_ROLE_ARN])
+    assert credentials._ROLE_CREDENTIALS[BETA_ROLE_ARN] is cached
+
+
+def test_expiring_role_is_refreshed(client) -> None:
+    """It re-assumes a role whose credentials are about to expire."""
+    store_role_credentials(BETA_ROLE_ARN, sts_credentials(timedelta(minutes=1)))
+    client.portal.call(aws.refresh_expiring_credentials, [BETA_ROLE_ARN])
+    assert credentials._ROLE_CREDENTIALS[BETA_ROLE_ARN]["access_key"] != "AKIA"
+
+
+def test_topic_in_other_account_uses_role(client) -> None:
+    """It reaches a topic in another account through the assumed role."""
+    response = client.post(
+        "/sns/beta/sub",
+        json={
+            "subscribtion_type": "https",
+            "subscription_details": {"endpoint": "https://example.com/hook"},
+        },
+    )
+    assert response.status_code == 200
+    assert ":210987654321:beta:" in response.json()["subscription_arn"]
+    assert len(client.get("/sns/beta/sub").json()) == 1
+
+
+def test_no_credentials_yet_is_a_503(sns) -> None:
+    """It fails fast with a 503, instead of waiting on sts, before the first refresh."""
+    # no with block, so startup never assumes the role
+    response = TestClient(app).get("/sns/beta/sub")
+    assert response.status_code == 503
+    assert get_circuit_breaker("us-west-2").state == CLOSED
+
+
+def test_expired_credentials_are_a_503(sns) -> None:
+    """It fails fast with a 503 when sts has failed long enough for them to expire."""
+    store_role_credentials(BETA_ROLE_ARN, sts_credentials(timedelta(minutes=-1)))
+    # no with block, so startup doesn't replace them
+    response = TestClient(app).get("/sns/beta/sub")
+    assert response.status_code == 503
+    assert "expired" in response.json()["detail"]
+    assert get_circuit_breaker("us-west-2").state == CLOSED
+
+
+def test_clients_pooled_per_role_region_and_type(client) -> None:
+    """It reuses one client per role, region and client type."""
+    for _ in range(2):
+        assert client.get("/sns/alpha/sub").status_code == 200
+        assert client.get("/sns/beta/sub").status_code == 200
+
+    assert set(aws._CLIENTS) == {
+        (None, "us-east-1", "sts"),
+        (None, "us-east-1", "sns"),
+        (BETA_ROLE_ARN, "us-west-2", "sns"),
+    }
+
+
+def test_roles_are_not_served(client) -> None:
+    """It keeps role arns out of the topic listings."""
+    assert "role_arn" not in client.get("/sns/beta").json()
+    assert all("role_arn" not in topic for topic in client.get("/sns").json())
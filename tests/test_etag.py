@@ -0,0 +1,92 @@
+"""Test cases for etags and conditional GETs on the listing endpoints."""
+
+import pytest
+
+from sns_sub_manager.config import get_config
+from sns_sub_manager.utils.etag import etag_matches
+from sns_sub_manager.utils.etag import make_etag
+
+
+ALPHA_ARN = "arn:aws:sns:us-east-1:123456789012:alpha"
+
+
+@pytest.mark.parametrize(
+    "if_none_match,expected",
+    [
+        (None, False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ("*", True),
+        (' "xyz" , W/"abc"', True),
+        ('"xyz", "123"', False),
+        ("abc", False),
+    ],
+)
+def test_etag_matches(if_none_match, expected: bool) -> None:
+    """It uses the weak comparison If-None-Match calls for."""
+    assert etag_matches(if_none_match, '"abc"') is expected
+
+
+def test_make_etag_is_stable() -> None:
+    """It hashes content, so key order doesn't matter."""
+    assert make_etag({"a": 1, "b": 2}) == make_etag({"b": 2, "a": 1})
+    assert make_etag({"a": 1}) != make_etag({"a": 2})
+
+
+@pytest.mark.parametrize("path", ["/sns", "/sns/alpha", "/sns/alpha/sub"])
+def test_conditional_get(client, path: str) -> None:
+    """It answers a matching If-None-Match with an empty 304."""
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get(path, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get(path, headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def cached_client(monkeypatch: pytest.MonkeyPatch, client):
+    """Fixture for a test client with the subscription cache turned on."""
+    monkeypatch.setenv("SUBSCRIPTION_CACHE_TTL", "60")
+    get_config.cache_clear()
+    return client
+
+
+def test_inventory_is_cached(cached_client, sns) -> None:
+    """It serves the cached inventory, skipping SNS, while it is fresh."""
+    first = cached_client.get("/sns/alpha/sub")
+    sns.subscribe(
+        TopicArn=ALPHA_ARN, Protocol="https", Endpoint="https://example.com/outside"
+    )
+    second = cached_client.get(
+        "/sns/alpha/sub", headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert second.status_code == 304
+
+
+def test_inventory_invalidated_on_change(cached_client) -> None:
+    """It drops the cached inventory after subscribing or unsubscribing."""
+    empty = cached_client.get("/sns/alpha/sub")
+    assert empty.json() == []
+
+    subscribed = cached_client.post(
+        "/sns/alpha/sub",
+        json={
+            "subscribtion_type": "https",
+            "subscription_details": {"endpoint": "https://example.com/hook"},
+        },
+    )
+    sub_arn = subscribed.json()["subscription_arn"]
+    listed = cached_client.get(
+        "/sns/alpha/sub", headers={"If-None-Match": empty.headers["etag"]}
+    )
+    assert listed.status_code == 200
+    assert [sub["arn"] for sub in listed.json()] == [sub_arn]
+
+    assert cached_client.delete(f"/sns/alpha/sub/{sub_arn}").status_code == 200
+    assert cached_client.get("/sns/alpha/sub").json() == []
@@ -0,0 +1,32 @@
+"""Test cases for the fast json path matching the response_model path."""
+
+import pytest
+
+from sns_sub_manager.config import get_config
+
+ALPHA_ARN = "arn:aws:sns:us-east-1:123456789012:alpha"
+
+
+@pytest.mark.parametrize("path,count", [("/sns", 2), ("/sns/alpha/sub", 2)])
+def test_fast_json_matches_default(
+    client, sns, monkeypatch, path: str, count: int
+) -> None:
+    """It serves the same body and ETag with or without response_model validation."""
+    sns.subscribe(
+        TopicArn=ALPHA_ARN, Protocol="https", Endpoint="https://example.com/hook"
+    )
+    sns.subscribe(TopicArn=ALPHA_ARN, Protocol="email", Endpoint="me@example.com")
+
+    monkeypatch.setenv("FAST_JSON_RESPONSES", "false")
+    get_config.cache_clear()
+    default = client.get(path)
+
+    monkeypatch.setenv("FAST_JSON_RESPONSES", "true")
+    get_config.cache_clear()
+    fast = client.get(path)
+
+    assert default.status_code == fast.status_code == 200
+    assert fast.json() == default.json()
+    assert len(fast.json()) == count
+    assert fast.headers["etag"] == default.headers["etag"]
+    assert fast.headers["content-type"] == default.headers["content-type"]
@@ -0,0 +1,105 @@
+"""Test cases for request tracing and the Server-Timing header."""
+
+import importlib
+import sys
+from typing import Iterator
+
+import pytest
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+
+from sns_sub_manager.config import get_config
+from sns_sub_manager.utils.tracing import Timing
+from sns_sub_manager.utils.tracing import TracedRoute
+from sns_sub_manager.utils.tracing import get_route_class
+from sns_sub_manager.utils.tracing import get_tracer
+from sns_sub_manager.utils.tracing import server_timing_header
+
+
+def reload_app():
+    """Rebuild the routers and app, they pick their route class and middleware on import"""
+    get_config.cache_clear()
+    get_tracer.cache_clear()
+    for name in list(sys.modules):
+        if name.startswith("sns_sub_manager.routes") or name == "sns_sub_manager.main":
+            del sys.modules[name]
+    return importlib.import_module("sns_sub_manager.main").app
+
+
+@pytest.fixture
+def traced_client(sns, monkeypatch) -> Iterator[TestClient]:
+    """Fixture for a test client on an app built with SERVER_TIMING on."""
+    monkeypatch.setenv("SERVER_TIMING", "true")
+    try:
+        with TestClient(reload_app()) as test_client:
+            yield test_client
+    finally:
+        monkeypatch.delenv("SERVER_TIMING")
+        reload_app()
+
+
+def stages(response) -> list:
+    return [
+        entry.split(";")[0].strip()
+        for entry in response.headers["server-timing"].split(",")
+    ]
+
+
+def test_server_timing_header() -> None:
+    """It formats timings in milliseconds, with their descriptions."""
+    header = server_timing_header(
+        [Timing("client", 0, 1_500_000, "sns us-east-1"), Timing("total", 0, 2_000_000)]
+    )
+    assert header == 'client; desc="sns us-east-1"; dur=1.500, total; dur=2.000'
+
+
+def test_timing_off_by_default(client) -> None:
+    """It leaves routes untimed and adds no header unless asked to."""
+    assert "server-timing" not in client.get("/sns/alpha/sub").headers
+    assert all(
+        type(route) is APIRoute
+        for route in client.app.routes
+        if route.path.startswith("/sns")
+    )
+
+
+def test_subscription_listing_stages(traced_client) -> None:
+    """It breaks a listing down into each stage of the request."""
+    response = traced_client.get("/sns/alpha/sub")
+    assert response.status_code == 200
+    assert stages(response) == [
+        "validate",
+        "client",
+        "sns_page",
+        "endpoint",
+        "encode",
+        "total",
+    ]
+
+    # the client is pooled after the first request
+    assert "client" not in stages(traced_client.get("/sns/alpha/sub"))
+
+
+def test_fast_json_encode_stage(traced_client, monkeypatch) -> None:
+    """It times encoding inside the endpoint when it builds the response itself."""
+    monkeypatch.setenv("FAST_JSON_RESPONSES", "true")
+    get_config.cache_clear()
+    response = traced_client.get("/sns/alpha/sub")
+    assert response.status_code == 200
+    assert {"validate", "sns_page", "encode", "endpoint"} <= set(stages(response))
+
+
+@pytest.mark.parametrize(
+    "enable_tracing,server_timing,route_class",
+    [
+        ("false", "false", APIRoute),
+        ("true", "false", TracedRoute),
+        ("false", "true", TracedRoute),
+    ],
+)
+def test_route_class(monkeypatch, enable_tracing, server_timing, route_class) -> None:
+    """It only times routes when tracing or Server-Timing is on."""
+    monkeypatch.setenv("ENABLE_TRACING", enable_tracing)
+    monkeypatch.setenv("SERVER_TIMING", server_timing)
+    get_config.cache_clear()
+    assert get_route_class() is route_class